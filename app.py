@@ -5,8 +5,24 @@ import pydeck as pdk
 from google.cloud import firestore
 from google.oauth2 import service_account
 from pathlib import Path
+import os
+
+from logbook_airports import METHOD_ICAO, AirportResolver
+from logbook_blocks import check_block_times
+from logbook_cache import MB, cache_manager
+from logbook_cube import CUBE_DIMENSIONS, build_hours_cube
+from logbook_export import export_bytes
+from logbook_ingest import ingest_documents
+from logbook_night import compute_night_minutes
+from logbook_pdf import DEFAULT_LAYOUT, extract_pdf_pages, generate_logbook_pdf_bytes, pdf_size_report
+from logbook_search import LogbookSearchIndex
+
+# Presupuesto de memoria común a todas las cachés del proceso (todas las sesiones)
+cache_manager.configure(max_bytes=int(os.environ.get("LOGBOOK_CACHE_MAX_MB", "512")) * MB)
+
+# Los datos de Firestore se vuelven a leer pasado este tiempo
+FIRESTORE_TTL_SECONDS = 10 * 60
 
-from logbook_pdf import DEFAULT_LAYOUT, generate_logbook_pdf_bytes
 
 def get_db_client():
     sa_info = dict(st.secrets["gcp_service_account"])
@@ -18,101 +34,14 @@ def get_db_client():
     creds = service_account.Credentials.from_service_account_info(sa_info, scopes=scopes)
     return firestore.Client(credentials=creds, project=str(project_id))
 
-@st.cache_data(show_spinner=False)
+@cache_manager.cached(ttl=FIRESTORE_TTL_SECONDS)
 def load_data_from_firestore():
     db = get_db_client()
     # Orden estable por ID de documento (0000..), para reproducir el orden del logbook
     docs = db.collection("logbook").order_by("__name__").stream()
-    # Mantener un orden estable de lectura para poder desempatar ordenaciones y
-    # conservar filas vacías en el export a PDF.
-    rows = [{**(doc.to_dict() or {}), "_doc_id": doc.id} for doc in docs]
-    if not rows:
-        return pd.DataFrame()
-    df = pd.DataFrame(rows)
-
-    # Índice estable de filas (orden de llegada desde Firestore)
-    df["_row_order"] = range(len(df))
-
-    # Documento numérico (por ejemplo "0007" -> 7). Si falla, queda NaN.
-    df["_doc_num"] = pd.to_numeric(df.get("_doc_id"), errors="coerce")
-
-    # Ordenar por id para reproducir el orden cronológico del logbook
-    if "_doc_num" in df.columns:
-        df = df.sort_values(by=["_doc_num", "_doc_id", "_row_order"], ascending=True, na_position="last").reset_index(drop=True)
-
-    # Normalizar nombres de columnas (espacios, mayúsculas, guiones bajos...)
-    def _norm_name(name: str) -> str:
-        return (
-            str(name)
-            .replace("_", " ")
-            .replace("-", " ")
-            .strip()
-            .casefold()
-        )
-
-    canonical = {
-        "fecha": "Fecha",
-        "tiempo total de vuelo": "Tiempo total de vuelo",
-        "noche": "Noche",
-        "ifr": "IFR",
-        "total de sesion": "Total de sesión",
-        "piloto al mando": "Piloto al mando",
-    }
-
-    rename_map = {}
-    for col in df.columns:
-        key = _norm_name(col)
-        if key in canonical:
-            rename_map[col] = canonical[key]
-
-    if rename_map:
-        df = df.rename(columns=rename_map)
-
-    # Convertir fecha
-    if "Fecha" in df.columns:
-        # Aceptar tanto string tipo dd/mm/YYYY como timestamp de Firestore
-        if pd.api.types.is_datetime64_any_dtype(df["Fecha"]):
-            df["Fecha"] = pd.to_datetime(df["Fecha"]).dt.date
-        else:
-            df["Fecha"] = pd.to_datetime(df["Fecha"], dayfirst=True, errors="coerce").dt.date
-
-    # Función auxiliar para convertir valores tipo "hh:mm" o numéricos a horas decimales
-    def time_to_hours(series):
-        if series is None:
-            return pd.Series(dtype="float")
-
-        s = series
-
-        def parse_value(x) -> float:
-            if pd.isna(x):
-                return 0.0
-            txt = str(x).strip()
-            if txt == "":
-                return 0.0
-
-            # Formato hh:mm (por ejemplo "01:54")
-            if ":" in txt:
-                parts = txt.split(":")
-                try:
-                    h = int(parts[0]) if len(parts) > 0 else 0
-                    m = int(parts[1]) if len(parts) > 1 else 0
-                    return float(h) + float(m) / 60.0
-                except Exception:
-                    return 0.0
-
-            # Intentar interpretarlo como número de horas (1.5 -> 1.5 h)
-            try:
-                return float(txt.replace(",", "."))
-            except Exception:
-                return 0.0
-
-        return s.apply(parse_value).astype(float)
-
-    for col in ["Tiempo total de vuelo", "Noche", "IFR", "Total de sesión", "Piloto al mando"]:
-        if col in df.columns:
-            df[col + "_horas"] = time_to_hours(df[col])
-
-    return df
+    # Una sola pasada: nombres normalizados, fechas/duraciones parseadas y _fecha_ref,
+    # conservando los documentos vacíos como filas en blanco para el PDF.
+    return ingest_documents(docs)
 
 
 def main():
@@ -129,14 +58,14 @@ def main():
         return f"{h:02d}:{m:02d}"
 
     with st.spinner("Cargando datos desde Firestore..."):
-        df = load_data_from_firestore()
+        df, ingest_report = load_data_from_firestore()
 
     if df.empty:
         st.warning("No se han encontrado datos en la colección 'logbook'.")
         return
 
     # Cargar datos de aeropuertos (ICAO -> lat/lon)
-    @st.cache_data(show_spinner=False)
+    @cache_manager.cached()
     def load_airports():
         try:
             ap = pd.read_csv("airports.csv", sep=";")
@@ -144,23 +73,24 @@ def main():
             return pd.DataFrame()
         ap = ap.rename(columns={"Lat": "lat", "Lon": "lon", "ICAO": "ICAO"})
         ap = ap.dropna(subset=["lat", "lon", "ICAO"])
-        return ap[["ICAO", "lat", "lon"]]
+        return ap[["ICAO", "IATA", "City", "lat", "lon"]]
 
     airports_df = load_airports()
 
+    # Índices ICAO / IATA / ciudad / espacial, construidos una sola vez
+    @cache_manager.cached()
+    def load_airport_resolver():
+        return AirportResolver(load_airports())
+
+    airport_resolver = load_airport_resolver() if not airports_df.empty else None
+
     # Filtro de fechas (usando Fecha para vuelos y Fecha simu para sesiones)
     if "Fecha" not in df.columns and "Fecha simu" not in df.columns:
         st.error("No se encuentran columnas de fecha en los datos.")
         return
 
-    # Fecha de vuelo
-    fecha_vuelo = pd.to_datetime(df.get("Fecha"), errors="coerce", dayfirst=True)
-    fecha_ref = fecha_vuelo.copy()
-
-    # Donde no haya fecha de vuelo, usar Fecha simu (sesiones de simulador)
-    if "Fecha simu" in df.columns:
-        fecha_simu = pd.to_datetime(df["Fecha simu"], errors="coerce", dayfirst=True)
-        fecha_ref = fecha_ref.where(fecha_ref.notna(), fecha_simu)
+    # Fecha de referencia: Fecha de vuelo o, si falta, Fecha simu (calculada al cargar)
+    fecha_ref = df["_fecha_ref"]
 
     fecha_valid = fecha_ref.dropna()
 
@@ -395,15 +325,26 @@ def main():
         st.altair_chart(chart_mat, width="stretch")
 
         # Mapa de rutas (solo vuelos reales con origen y destino conocidos)
-        if not df_vuelos.empty and not airports_df.empty:
+        if not df_vuelos.empty and airport_resolver is not None:
             rutas = df_vuelos.dropna(subset=["Origen", "Destino"])[["Origen", "Destino"]].copy()
-            rutas = rutas.rename(columns={"Origen": "ICAO_origen", "Destino": "ICAO_destino"})
 
-            rutas = (
-                rutas
-                .merge(airports_df.add_prefix("orig_"), left_on="ICAO_origen", right_on="orig_ICAO", how="inner")
-                .merge(airports_df.add_prefix("dest_"), left_on="ICAO_destino", right_on="dest_ICAO", how="inner")
-            )
+            # Resolver en bloque (ICAO, IATA, ciudad o aproximado) en vez de un merge exacto por ICAO
+            orig = airport_resolver.resolve(rutas["Origen"])
+            dest = airport_resolver.resolve(rutas["Destino"])
+            resueltos = orig["ICAO"].notna() & dest["ICAO"].notna()
+            recuperados = resueltos & ((orig["metodo"] != METHOD_ICAO) | (dest["metodo"] != METHOD_ICAO))
+
+            rutas = pd.DataFrame(
+                {
+                    "ICAO_origen": orig["ICAO"],
+                    "ICAO_destino": dest["ICAO"],
+                    "orig_lat": orig["lat"],
+                    "orig_lon": orig["lon"],
+                    "dest_lat": dest["lat"],
+                    "dest_lon": dest["lon"],
+                },
+                index=rutas.index,
+            )[resueltos]
 
             # Hacer las rutas no dirigidas: LEMD->EBBR y EBBR->LEMD cuentan como la misma
             if not rutas.empty:
@@ -426,6 +367,10 @@ def main():
                 )
 
                 st.subheader("Mapa de rutas")
+                st.caption(
+                    f"{int(recuperados.sum())} tramos recuperados por IATA, ciudad o aproximación; "
+                    f"{int((~resueltos).sum())} tramos sin aeropuerto conocido."
+                )
 
                 # Centro aproximado del mapa: media de todas las coordenadas
                 center_lat = float((rutas_grouped["orig_lat"].mean() + rutas_grouped["dest_lat"].mean()) / 2)
@@ -450,18 +395,127 @@ def main():
                 deck = pdk.Deck(layers=[layer], initial_view_state=view_state)
                 st.pydeck_chart(deck)
 
+    # Cubo de horas (año × mes × tipo × matrícula × PIC × función × reglas × día/noche)
+    # con roll-up / drill-down
+    @cache_manager.cached()
+    def _build_cube_cached(df_cube: pd.DataFrame):
+        return build_hours_cube(df_cube)
+
+    cube = _build_cube_cached(df_filtered)
+    if not cube.base.empty:
+        st.subheader("Cubo de horas")
+        col_p1, col_p2, col_p3 = st.columns(3)
+        with col_p1:
+            pivot_rows = st.multiselect("Filas", list(CUBE_DIMENSIONS), default=["Año"])
+        with col_p2:
+            column_options = ["(ninguna)"] + [d for d in CUBE_DIMENSIONS if d not in pivot_rows]
+            pivot_column = st.selectbox("Columnas", column_options)
+        with col_p3:
+            pivot_measure = st.selectbox("Medida", list(cube.measures), index=list(cube.measures).index("Horas vuelo"))
+
+        # Drill-down: fijar valores de dimensiones concretas
+        pivot_filters = {}
+        filter_cols = st.columns(4)
+        for i, dim in enumerate(CUBE_DIMENSIONS):
+            with filter_cols[i % len(filter_cols)]:
+                choice = st.selectbox(dim, ["(todos)"] + cube.values(dim), key=f"cube_filter_{dim}")
+            if choice != "(todos)":
+                pivot_filters[dim] = choice
+
+        pivot_df = cube.pivot(
+            pivot_rows,
+            None if pivot_column == "(ninguna)" else pivot_column,
+            pivot_measure,
+            filters=pivot_filters,
+        )
+        st.dataframe(pivot_df.round(2), width="stretch")
+
+    if ingest_report.total_failures:
+        with st.expander(f"Valores no válidos al cargar ({ingest_report.total_failures})"):
+            st.dataframe(
+                pd.DataFrame(
+                    [
+                        {
+                            "Campo": campo,
+                            "Errores": errores,
+                            "Ejemplos": ", ".join(
+                                f"{doc_id}: {valor}" for doc_id, valor in ingest_report.failure_examples.get(campo, [])
+                            ),
+                        }
+                        for campo, errores in ingest_report.parse_failures.items()
+                    ]
+                ),
+                width="stretch",
+                hide_index=True,
+            )
+
+    # Calidad de datos: horas de bloque reconstruidas desde Salida/Llegada
+    st.subheader("Calidad de datos: horas de bloque")
+    bloques = check_block_times(df_filtered)
+    incidencias = bloques[bloques["incidencias"] != ""]
+
+    col_q1, col_q2, col_q3 = st.columns(3)
+    col_q1.metric("Tramos revisados", len(bloques))
+    col_q2.metric("Tramos con incidencias", len(incidencias))
+    col_q3.metric("Cruzan medianoche", int(bloques["cruza_medianoche"].sum()))
+
+    if incidencias.empty:
+        st.success("Todos los tramos cuadran con su tiempo total de vuelo.")
+    else:
+        st.warning(
+            f"{len(incidencias)} tramos con incidencias. Revísalos antes de exportar el logbook."
+        )
+        columnas_origen = [c for c in ["Fecha", "Origen", "Salida", "Destino", "Llegada", "Tiempo total de vuelo"] if c in df_filtered.columns]
+        tabla_incidencias = df_filtered.loc[incidencias.index, columnas_origen].join(
+            incidencias[["minutos_bloque", "solapa_con", "incidencias"]]
+        )
+        st.dataframe(tabla_incidencias, width="stretch")
+
+    # Noche calculada a partir de la posición del sol a lo largo de la ruta
+    @cache_manager.cached()
+    def _compute_night_cached(df_night: pd.DataFrame, _resolver: AirportResolver) -> pd.DataFrame:
+        # El resolver sale de airports.csv (fijo): no entra en la clave de caché
+        return compute_night_minutes(df_night, _resolver)
+
+    if airport_resolver is not None and not df_vuelos.empty:
+        st.subheader("Calidad de datos: horas de noche")
+        noche = _compute_night_cached(df_vuelos, airport_resolver)
+        noche_ok = noche[noche["minutos_noche_calculados"].notna()]
+        discrepancias = noche_ok[noche_ok["diferencia_noche"].abs() > 10]
+
+        col_n1, col_n2, col_n3 = st.columns(3)
+        col_n1.metric("Noche registrada", format_hours(noche_ok["minutos_noche_registrados"].sum() / 60))
+        col_n2.metric("Noche calculada", format_hours(noche_ok["minutos_noche_calculados"].sum() / 60))
+        col_n3.metric("Tramos con diferencia > 10 min", len(discrepancias))
+
+        sin_calculo = len(noche) - len(noche_ok)
+        if sin_calculo:
+            st.caption(f"{sin_calculo} tramos sin coordenadas o sin Salida/Llegada válidas no se han calculado.")
+        if not discrepancias.empty:
+            columnas_origen = [c for c in ["Fecha", "Origen", "Salida", "Destino", "Llegada", "Noche"] if c in df_vuelos.columns]
+            st.dataframe(
+                df_vuelos.loc[discrepancias.index, columnas_origen].join(
+                    discrepancias[["minutos_noche_registrados", "minutos_noche_calculados", "diferencia_noche"]]
+                ),
+                width="stretch",
+            )
+
     st.subheader("Exportar Logbook a PDF")
 
-    @st.cache_data(show_spinner=False)
-    def _build_pdf_cached(df_for_pdf: pd.DataFrame, generator_salt: float) -> bytes:
+    @cache_manager.cached()
+    def _build_pdf_cached(df_for_pdf: pd.DataFrame, generator_salt: float, compact: bool = True) -> bytes:
         return generate_logbook_pdf_bytes(
             df_for_pdf,
             template_path="Logbook_Rellenable.pdf",
             layout=DEFAULT_LAYOUT,
             max_font_size=10,
             min_font_size=6,
+            compact=compact,
         )
 
+    # PDF compacto: recursos compartidos entre páginas y content streams comprimidos
+    compact_pdf = st.checkbox("PDF compacto", value=True)
+
     # Para el PDF: respetar el orden real del logbook por ID de documento (0000..).
     # Dentro del rango de fechas, cogemos el PRIMER y ÚLTIMO doc_id y exportamos
     # todo lo que haya ENTRE medias (incluye documentos vacíos como filas en blanco).
@@ -484,7 +538,16 @@ def main():
     with st.spinner("Generando Logbook.pdf..."):
         # Invalida la caché automáticamente cuando cambia el generador
         generator_salt = Path("logbook_pdf.py").stat().st_mtime if Path("logbook_pdf.py").exists() else 0.0
-        pdf_bytes = _build_pdf_cached(df_for_pdf, generator_salt)
+        pdf_bytes = _build_pdf_cached(df_for_pdf, generator_salt, compact_pdf)
+
+    if compact_pdf and st.checkbox("Comparar tamaño con el PDF estándar", value=False):
+        with st.spinner("Generando PDF estándar para comparar..."):
+            standard_bytes = _build_pdf_cached(df_for_pdf, generator_salt, False)
+        report = pdf_size_report(standard_bytes, pdf_bytes)
+        col_s1, col_s2, col_s3 = st.columns(3)
+        col_s1.metric("Bytes/página (estándar)", f"{report.standard_bytes_per_page:,.0f}")
+        col_s2.metric("Bytes/página (compacto)", f"{report.compact_bytes_per_page:,.0f}")
+        col_s3.metric("Ahorro", f"{report.saving_ratio:.0%}")
 
     downloaded = st.download_button(
         "Logbook",
@@ -495,6 +558,110 @@ def main():
 
     _ = downloaded
 
+    # Export columnar del logbook normalizado (mismo periodo seleccionado).
+    # Solo se genera el formato elegido, y solo si se elige uno.
+    @cache_manager.cached()
+    def _build_export_cached(df_export: pd.DataFrame, fmt: str) -> bytes:
+        return export_bytes(df_export, fmt, airport_resolver)
+
+    export_formats = {
+        "Parquet": ("parquet", "Logbook.parquet", "application/vnd.apache.parquet"),
+        "Arrow IPC": ("arrow", "Logbook.arrow", "application/vnd.apache.arrow.file"),
+    }
+    export_choice = st.selectbox("Exportar datos", ["(ninguno)"] + list(export_formats))
+    if export_choice in export_formats:
+        fmt, file_name, mime = export_formats[export_choice]
+        st.download_button(
+            f"Datos ({export_choice})",
+            data=_build_export_cached(df_filtered, fmt),
+            file_name=file_name,
+            mime=mime,
+        )
+
+    # Búsqueda sobre las mismas filas (y en el mismo orden) que el PDF exportado
+    st.subheader("Buscar en el logbook")
+
+    @cache_manager.cached()
+    def _build_search_index_cached(df_index: pd.DataFrame) -> LogbookSearchIndex:
+        return LogbookSearchIndex(df_index, rows_per_page=DEFAULT_LAYOUT.rows_per_page)
+
+    search_index = _build_search_index_cached(df_for_pdf)
+
+    @cache_manager.cached()
+    def _extract_pages_cached(pdf: bytes, pages: tuple[int, ...]) -> bytes:
+        return extract_pdf_pages(pdf, pages)
+
+    search_text = st.text_input("Texto libre", placeholder="Ej.: galan ec-abc lemd")
+    col_s1, col_s2, col_s3, col_s4 = st.columns(4)
+    with col_s1:
+        search_pic = st.text_input("PIC")
+    with col_s2:
+        search_mat = st.text_input("Matrícula")
+    with col_s3:
+        search_orig = st.text_input("Origen")
+    with col_s4:
+        search_dest = st.text_input("Destino")
+
+    search_filters = {
+        field: value
+        for field, value in (
+            ("Nombre del PIC", search_pic),
+            ("Matrícula", search_mat),
+            ("Origen", search_orig),
+            ("Destino", search_dest),
+        )
+        if value.strip()
+    }
+
+    if search_text.strip() or search_filters:
+        result = search_index.search(filters=search_filters, text=search_text)
+        if result.count == 0:
+            st.info("No hay resultados para la búsqueda.")
+        else:
+            st.write(f"{result.count} filas encontradas en las páginas del PDF: " + ", ".join(map(str, result.pages)))
+            rangos = [f"{s + 1}-{e + 1}" if s != e else str(s + 1) for s, e in result.row_ranges]
+            st.caption("Filas: " + ", ".join(rangos))
+
+            # Ir a la página: descarga solo esa página (o todas las que tienen resultados)
+            todas = "Todas las páginas con resultados"
+            col_g1, col_g2 = st.columns(2)
+            with col_g1:
+                pagina = st.selectbox("Ir a la página", [todas] + [int(p) for p in result.pages])
+            paginas = list(result.pages) if pagina == todas else [pagina]
+            with col_g2:
+                st.download_button(
+                    "Descargar páginas" if pagina == todas else f"Descargar página {pagina}",
+                    data=_extract_pages_cached(pdf_bytes, tuple(int(p) for p in paginas)),
+                    file_name="Logbook_busqueda.pdf" if pagina == todas else f"Logbook_pagina_{pagina}.pdf",
+                    mime="application/pdf",
+                )
+
+            resultados = df_for_pdf.iloc[result.positions].copy()
+            resultados.insert(0, "Página", result.positions // DEFAULT_LAYOUT.rows_per_page + 1)
+            columnas = ["Página"] + [c.field for c in DEFAULT_LAYOUT.columns if c.field in resultados.columns]
+            st.dataframe(resultados[columnas].head(500), width="stretch", hide_index=True)
+
+    with st.expander("Métricas de caché"):
+        cache_stats = pd.DataFrame(
+            [
+                {
+                    "Caché": stats.name.rsplit(".", 1)[-1],
+                    "Entradas": stats.entries,
+                    "MB": round(stats.bytes / MB, 2),
+                    "Aciertos": stats.hits,
+                    "Fallos": stats.misses,
+                    "Ratio de aciertos": round(stats.hit_ratio, 3),
+                    "Expulsiones": stats.evictions,
+                    "Caducadas": stats.expirations,
+                }
+                for stats in cache_manager.stats()
+            ]
+        )
+        st.write(
+            f"Uso total: {cache_manager.total_bytes / MB:,.1f} MB de {cache_manager.max_bytes / MB:,.0f} MB"
+        )
+        st.dataframe(cache_stats, width="stretch", hide_index=True)
+
 
 if __name__ == "__main__":
     main()
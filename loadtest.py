@@ -0,0 +1,263 @@
+"""Prueba de carga del dashboard con sesiones concurrentes simuladas.
+
+Lanza N sesiones headless (``streamlit.testing.v1.AppTest``) contra un cliente de
+Firestore falso con datos sintéticos. Cada sesión cambia el periodo, alterna
+"Omitirme" y pide la comparación de PDF, y se mide la latencia de cada rerun.
+
+Uso:
+    python loadtest.py --sessions 8 --interactions 20 --rows 3000
+"""
+
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import datetime as dt
+import json
+import os
+from pathlib import Path
+import random
+import resource
+import threading
+import time
+
+import numpy as np
+
+
+APP_DIR = Path(__file__).resolve().parent
+
+_PICS = ["GALÁN", "PÉREZ", "LÓPEZ", "GARCÍA", "MARTÍN", "SÁNCHEZ", "ROMERO", "NAVARRO"]
+_AIRPORTS = ["LEMD", "LEBL", "LEPA", "LEMG", "GCLP", "EBBR", "EGLL", "LFPG", "EDDF", "LIRF", "BCN", "MAD"]
+_TYPES = [("A320", ["EC-MAA", "EC-MAB", "EC-MAC"]), ("A321", ["EC-NBA", "EC-NBB"]), ("B738", ["EC-LXA"])]
+
+
+class FakeDocument:
+    def __init__(self, doc_id: str, data: dict):
+        self.id = doc_id
+        self._data = data
+
+    def to_dict(self) -> dict:
+        return dict(self._data)
+
+
+class FakeQuery:
+    def __init__(self, docs: list[FakeDocument]):
+        self._docs = docs
+
+    def order_by(self, *args, **kwargs) -> "FakeQuery":
+        return self
+
+    def stream(self):
+        return iter(self._docs)
+
+
+class FakeFirestoreClient:
+    """Sustituto mínimo de ``firestore.Client`` para ``collection(...).order_by(...).stream()``."""
+
+    def __init__(self, num_rows: int, seed: int = 0):
+        self._docs = [FakeDocument(f"{i:04d}", data) for i, data in enumerate(synthetic_rows(num_rows, seed))]
+
+    def collection(self, name: str) -> FakeQuery:
+        return FakeQuery(self._docs)
+
+
+def _hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def synthetic_rows(num_rows: int, seed: int = 0) -> list[dict]:
+    """Documentos sintéticos con el mismo formato que la colección ``logbook``."""
+    rng = random.Random(seed)
+    day = dt.date(2015, 1, 1)
+    rows = []
+    for i in range(num_rows):
+        if i % 97 == 96:
+            rows.append({})  # documento vacío: fila en blanco en el PDF
+            continue
+        day += dt.timedelta(days=rng.choice([0, 0, 1, 1, 2]))
+        if i % 41 == 40:
+            rows.append(
+                {
+                    "Fecha simu": day.strftime("%d/%m/%Y"),
+                    "Tipo": "A320 FFS",
+                    "Total de sesión": _hhmm(rng.choice([120, 180, 240])),
+                }
+            )
+            continue
+        salida = rng.randrange(0, 24 * 60, 5)
+        block = rng.randrange(45, 300, 5)
+        fabricante, matriculas = rng.choice(_TYPES)
+        night = rng.choice([0, 0, 0, block // 3])
+        rows.append(
+            {
+                "Fecha": day.strftime("%d/%m/%Y"),
+                "Origen": rng.choice(_AIRPORTS),
+                "Destino": rng.choice(_AIRPORTS),
+                "Salida": _hhmm(salida),
+                "Llegada": _hhmm((salida + block) % (24 * 60)),
+                "Fabricante": fabricante,
+                "Matrícula": rng.choice(matriculas),
+                "Tiempo multipiloto": _hhmm(block),
+                "Tiempo total de vuelo": _hhmm(block),
+                "Nombre del PIC": rng.choice(_PICS),
+                "Landings día": rng.choice([0, 1]),
+                "Landings Noche": rng.choice([0, 0, 1]),
+                "Noche": _hhmm(night) if night else "",
+                "IFR": _hhmm(block),
+                "Co-piloto": _hhmm(block),
+                "Observaciones": rng.choice(["", "", "Go around", "Desvío"]),
+            }
+        )
+    return rows
+
+
+_install_lock = threading.Lock()
+
+
+def install_fake_firestore(num_rows: int, seed: int = 0) -> None:
+    """Sustituye ``app.get_db_client`` por el cliente falso (una vez por tamaño de datos)."""
+    import app
+
+    with _install_lock:
+        if getattr(app.get_db_client, "_fake_rows", None) != num_rows:
+            client = FakeFirestoreClient(num_rows, seed)
+
+            def _fake_client():
+                return client
+
+            _fake_client._fake_rows = num_rows
+            app.get_db_client = _fake_client
+            # La caché de Firestore es de proceso: sin esto se medirían los datos anteriores
+            app.load_data_from_firestore.clear()
+
+
+def _app_script(num_rows: int, seed: int) -> None:
+    # Se ejecuta dentro de AppTest: importar aquí, no en el ámbito del módulo
+    import loadtest
+    import app
+
+    loadtest.install_fake_firestore(num_rows, seed)
+    app.main()
+
+
+@dataclass
+class SessionResult:
+    latencies: list[float] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+
+
+def _checkbox(at, label: str):
+    for box in at.checkbox:
+        if box.label == label:
+            return box
+    return None
+
+
+def run_session(session_id: int, *, num_rows: int, interactions: int, seed: int, timeout: float) -> SessionResult:
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed * 1000 + session_id)
+    result = SessionResult()
+    at = AppTest.from_function(_app_script, args=(num_rows, seed), default_timeout=timeout)
+
+    def _timed(action) -> None:
+        start = time.perf_counter()
+        try:
+            action()
+        except Exception as exc:  # noqa: BLE001 - se contabiliza como error de la sesión
+            result.errors.append(f"{type(exc).__name__}: {exc}")
+            return
+        result.latencies.append(time.perf_counter() - start)
+        result.errors.extend(str(e.value) for e in at.exception)
+
+    _timed(at.run)
+    if not at.date_input:
+        result.errors.append("La app no ha mostrado el selector de fechas.")
+        return result
+
+    min_date = at.date_input[0].min
+    max_date = at.date_input[0].max
+    span = (max_date - min_date).days
+
+    for _ in range(interactions):
+        kind = rng.choice(["periodo", "periodo", "omitirme", "pdf"])
+        if kind == "periodo":
+            start = min_date + dt.timedelta(days=rng.randrange(0, max(1, span)))
+            end = min(max_date, start + dt.timedelta(days=rng.randrange(30, 720)))
+            _timed(lambda: at.date_input[0].set_value((start, end)).run())
+        elif kind == "omitirme" and _checkbox(at, "Omitirme") is not None:
+            box = _checkbox(at, "Omitirme")
+            _timed(lambda: box.set_value(not box.value).run())
+        else:
+            box = _checkbox(at, "Comparar tamaño con el PDF estándar")
+            if box is not None:
+                _timed(lambda: box.set_value(not box.value).run())
+            else:
+                _timed(at.run)
+    return result
+
+
+def _peak_rss_mb() -> float:
+    # En Linux ru_maxrss va en KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def run_load_test(*, sessions: int, interactions: int, num_rows: int, seed: int = 0, timeout: float = 120.0) -> dict:
+    os.chdir(APP_DIR)
+    rss_before = _peak_rss_mb()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        futures = [
+            pool.submit(run_session, i, num_rows=num_rows, interactions=interactions, seed=seed, timeout=timeout)
+            for i in range(sessions)
+        ]
+        results = [f.result() for f in futures]
+    elapsed = time.perf_counter() - started
+
+    latencies = np.array([lat for r in results for lat in r.latencies]) * 1000.0
+    errors = [e for r in results for e in r.errors]
+    p50, p95, p99 = (np.percentile(latencies, [50, 95, 99]) if len(latencies) else (np.nan,) * 3)
+    return {
+        "sessions": sessions,
+        "interactions_per_session": interactions,
+        "rows": num_rows,
+        "reruns": int(len(latencies)),
+        "errors": len(errors),
+        "first_errors": errors[:5],
+        "elapsed_s": round(elapsed, 2),
+        "p50_ms": round(float(p50), 1),
+        "p95_ms": round(float(p95), 1),
+        "p99_ms": round(float(p99), 1),
+        "max_ms": round(float(latencies.max()), 1) if len(latencies) else None,
+        "peak_rss_mb_before": round(rss_before, 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Prueba de carga del dashboard de Logbook.")
+    parser.add_argument("--sessions", type=int, default=8, help="Sesiones concurrentes")
+    parser.add_argument("--interactions", type=int, default=20, help="Interacciones por sesión")
+    parser.add_argument("--rows", type=int, default=3000, help="Documentos sintéticos en Firestore")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120.0, help="Tiempo máximo por rerun (s)")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args()
+
+    report = run_load_test(
+        sessions=args.sessions,
+        interactions=args.interactions,
+        num_rows=args.rows,
+        seed=args.seed,
+        timeout=args.timeout,
+    )
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return
+    for key, value in report.items():
+        print(f"{key:>26}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import difflib
+
+import numpy as np
+import pandas as pd
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Métodos de resolución, en orden de prioridad
+METHOD_ICAO = "ICAO"
+METHOD_IATA = "IATA"
+METHOD_CITY = "Ciudad"
+METHOD_FUZZY = "Aproximado"
+
+# Rejilla del índice espacial: celdas de 1° x 1°
+_GRID_LAT_CELLS = 180
+_GRID_LON_CELLS = 360
+
+
+def haversine_km(lat0, lon0, lat1, lon1) -> np.ndarray:
+    lat0, lon0, lat1, lon1 = (np.radians(np.asarray(v, dtype=float)) for v in (lat0, lon0, lat1, lon1))
+    a = np.sin((lat1 - lat0) / 2) ** 2 + np.cos(lat0) * np.cos(lat1) * np.sin((lon1 - lon0) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _normalize_code(values: pd.Series) -> pd.Series:
+    """"lemd ", "LE-MD" -> "LEMD"."""
+    return values.astype("string").str.upper().str.replace(r"[^0-9A-Z]", "", regex=True)
+
+
+def _normalize_city(values: pd.Series) -> pd.Series:
+    return (
+        values.astype("string")
+        .str.casefold()
+        .str.normalize("NFKD")
+        .str.encode("ascii", errors="ignore")
+        .str.decode("ascii")
+        .str.replace(r"[^0-9a-z]+", " ", regex=True)
+        .str.strip()
+    )
+
+
+def _take(values: np.ndarray, positions: np.ndarray, fill):
+    """``values[positions]`` con ``fill`` donde la posición es negativa (no encontrado)."""
+    out = np.full(len(positions), fill, dtype=values.dtype if fill is not None else object)
+    found = positions >= 0
+    out[found] = values[positions[found]]
+    return out
+
+
+class AirportResolver:
+    """Resuelve códigos de aeropuerto (ICAO, IATA, ciudad o aproximado) a coordenadas.
+
+    Los índices se construyen una vez; ``resolve`` trabaja sobre los valores únicos
+    de la serie completa, no fila a fila.
+    """
+
+    def __init__(self, airports: pd.DataFrame, *, fuzzy_cutoff: float = 0.85):
+        ap = airports.dropna(subset=["ICAO", "lat", "lon"]).copy()
+        ap["ICAO"] = _normalize_code(ap["ICAO"])
+        ap = ap[ap["ICAO"] != ""].drop_duplicates("ICAO").reset_index(drop=True)
+        has_iata = ap["IATA"].notna() if "IATA" in ap.columns else pd.Series(False, index=ap.index)
+
+        self.airports = ap[["ICAO", "lat", "lon"]]
+        self.fuzzy_cutoff = float(fuzzy_cutoff)
+        self._lat = ap["lat"].to_numpy(dtype=float)
+        self._lon = ap["lon"].to_numpy(dtype=float)
+
+        self._icao_index = pd.Index(ap["ICAO"])
+
+        if "IATA" in ap.columns:
+            iata = _normalize_code(ap.loc[has_iata, "IATA"])
+            iata = iata[(iata != "") & ~iata.duplicated()]
+            self._iata_index = pd.Index(iata.to_numpy())
+            self._iata_rows = iata.index.to_numpy()
+        else:
+            self._iata_index = pd.Index([])
+            self._iata_rows = np.empty(0, dtype=np.int64)
+
+        if "City" in ap.columns:
+            # Solo ciudades con un único aeropuerto IATA: un nombre ambiguo ("London",
+            # "Paris") no se resuelve antes que arriesgar otra ciudad homónima
+            city = _normalize_city(ap["City"])
+            city = city[has_iata & city.notna() & (city != "")]
+            city = city[~city.duplicated(keep=False)]
+            self._city_index = pd.Index(city.to_numpy())
+            self._city_rows = city.index.to_numpy()
+            # Candidatos para la búsqueda aproximada: las mismas ciudades no ambiguas
+            self._fuzzy_keys = city.tolist()
+            self._fuzzy_rows = dict(zip(self._city_index, self._city_rows))
+        else:
+            self._city_index = pd.Index([])
+            self._city_rows = np.empty(0, dtype=np.int64)
+            self._fuzzy_keys = []
+            self._fuzzy_rows = {}
+
+        # Índice espacial: aeropuertos ordenados por celda de la rejilla, con el
+        # inicio de cada celda (estructura CSR: celda -> tramo de _cell_order)
+        cells = _grid_cell(self._lat, self._lon)
+        self._cell_order = np.argsort(cells, kind="mergesort")
+        self._cell_start = np.searchsorted(
+            cells[self._cell_order], np.arange(_GRID_LAT_CELLS * _GRID_LON_CELLS + 1)
+        )
+
+    def resolve(self, codes: pd.Series) -> pd.DataFrame:
+        """Devuelve ``ICAO``, ``lat``, ``lon`` y ``metodo`` para cada valor de ``codes``.
+
+        Los valores que no se pueden resolver quedan con NaN (y ``metodo`` vacío).
+        """
+        uniques = pd.Series(pd.unique(codes.astype("string").fillna("")), dtype="string")
+        codes_norm = _normalize_code(uniques).fillna("")
+        cities_norm = _normalize_city(uniques).fillna("")
+
+        rows = np.full(len(uniques), -1, dtype=np.int64)
+        method = np.full(len(uniques), "", dtype=object)
+
+        def _apply(found_rows: np.ndarray, label: str):
+            pending = (rows < 0) & (found_rows >= 0)
+            rows[pending] = found_rows[pending]
+            method[pending] = label
+
+        _apply(self._icao_index.get_indexer(codes_norm), METHOD_ICAO)
+
+        iata_pos = self._iata_index.get_indexer(codes_norm)
+        _apply(_take(self._iata_rows, iata_pos, -1), METHOD_IATA)
+
+        # Un token con forma de código (3-4 letras/dígitos) que no es ICAO ni IATA
+        # conocido no se busca como ciudad: "ROMA" no debe acabar en Roma (Queensland)
+        code_like = uniques.fillna("").str.strip().str.fullmatch(r"[0-9A-Za-z]{3,4}").to_numpy(dtype=bool)
+
+        city_pos = self._city_index.get_indexer(cities_norm)
+        city_pos[code_like] = -1
+        _apply(_take(self._city_rows, city_pos, -1), METHOD_CITY)
+
+        if self._fuzzy_keys:
+            fuzzy_rows = np.full(len(uniques), -1, dtype=np.int64)
+            for i in np.flatnonzero((rows < 0) & ~code_like & (cities_norm.str.len().to_numpy() > 3)):
+                match = difflib.get_close_matches(cities_norm.iloc[i], self._fuzzy_keys, n=1, cutoff=self.fuzzy_cutoff)
+                if match:
+                    fuzzy_rows[i] = self._fuzzy_rows[match[0]]
+            _apply(fuzzy_rows, METHOD_FUZZY)
+
+        per_unique = pd.DataFrame(
+            {
+                "ICAO": _take(self.airports["ICAO"].to_numpy(dtype=object), rows, None),
+                "lat": _take(self._lat, rows, np.nan),
+                "lon": _take(self._lon, rows, np.nan),
+                "metodo": method,
+            }
+        )
+        inverse = pd.Index(uniques).get_indexer(codes.astype("string").fillna(""))
+        result = per_unique.iloc[inverse]
+        result.index = codes.index
+        return result
+
+    def nearest(self, lat, lon, *, initial_radius_km: float = 50.0, chunk_size: int = 256) -> pd.DataFrame:
+        """Aeropuerto conocido más cercano a cada punto (``ICAO`` y ``distancia_km``).
+
+        Busca en las celdas de la rejilla que cubren un radio que se duplica hasta
+        encontrar un candidato dentro de él; todo aeropuerto fuera de esas celdas
+        está necesariamente más lejos. Las consultas pendientes se procesan juntas,
+        por bloques de ``chunk_size`` puntos.
+        """
+        lat = np.atleast_1d(np.asarray(lat, dtype=float))
+        lon = np.atleast_1d(np.asarray(lon, dtype=float))
+        best_rows = np.full(len(lat), -1, dtype=np.int64)
+        best_dist = np.full(len(lat), np.nan)
+
+        queries = np.flatnonzero(~np.isnan(lat) & ~np.isnan(lon)) if len(self._lat) else np.empty(0, dtype=np.int64)
+        for lo in range(0, len(queries), chunk_size):
+            pending = queries[lo:lo + chunk_size]
+            radius = np.full(len(pending), float(initial_radius_km))
+            while len(pending):
+                rows, dist, whole_globe = self._nearest_within(lat[pending], lon[pending], radius)
+                done = (rows >= 0) & ((dist <= radius) | whole_globe)
+                best_rows[pending[done]] = rows[done]
+                best_dist[pending[done]] = dist[done]
+                pending, radius = pending[~done], radius[~done] * 2
+
+        return pd.DataFrame(
+            {
+                "ICAO": _take(self.airports["ICAO"].to_numpy(dtype=object), best_rows, None),
+                "distancia_km": best_dist,
+            }
+        )
+
+    def _nearest_within(
+        self, lat: np.ndarray, lon: np.ndarray, radius_km: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Aeropuerto más cercano entre las celdas que cubren el radio de cada consulta.
+
+        Devuelve fila (-1 si no hay candidatos), distancia y si las celdas ya cubren
+        todo el globo (en ese caso el candidato es el más cercano sin importar el radio).
+        """
+        ang = radius_km / EARTH_RADIUS_KM
+        band = np.degrees(ang)
+        lat_lo = np.maximum(lat - band, -90.0)
+        lat_hi = np.minimum(lat + band, 90.0)
+
+        # Semiancho en longitud del rectángulo que contiene el círculo; si el
+        # círculo alcanza un polo hay que recorrer todas las longitudes
+        polar = (lat - band <= -90.0) | (lat + band >= 90.0)
+        ratio = np.sin(np.minimum(ang, np.pi / 2)) / np.maximum(np.cos(np.radians(lat)), 1e-12)
+        half_lon = np.where(polar | (ratio >= 1.0), 180.0, np.degrees(np.arcsin(np.minimum(ratio, 1.0))))
+
+        lat_cell0 = np.clip(np.floor(lat_lo + 90.0), 0, _GRID_LAT_CELLS - 1).astype(np.int64)
+        lat_cell1 = np.clip(np.floor(lat_hi + 90.0), 0, _GRID_LAT_CELLS - 1).astype(np.int64)
+        n_lat = lat_cell1 - lat_cell0 + 1
+        full_lon = half_lon >= 180.0
+        lon_cell0 = np.where(full_lon, 0, np.floor(lon - half_lon + 180.0)).astype(np.int64)
+        lon_cell1 = np.floor(lon + half_lon + 180.0).astype(np.int64)
+        n_lon = np.where(full_lon, _GRID_LON_CELLS, np.minimum(lon_cell1 - lon_cell0 + 1, _GRID_LON_CELLS))
+        whole_globe = (n_lat == _GRID_LAT_CELLS) & (n_lon == _GRID_LON_CELLS)
+
+        # Celdas de todas las consultas en un único array plano (agrupadas por consulta)
+        n_cells = n_lat * n_lon
+        cell_owner = np.repeat(np.arange(len(lat)), n_cells)
+        k = np.arange(n_cells.sum()) - np.repeat(np.cumsum(n_cells) - n_cells, n_cells)
+        lat_cells = lat_cell0[cell_owner] + k // n_lon[cell_owner]
+        lon_cells = (lon_cell0[cell_owner] + k % n_lon[cell_owner]) % _GRID_LON_CELLS
+        cells = lat_cells * _GRID_LON_CELLS + lon_cells
+
+        # Aeropuertos de esas celdas, también en un array plano
+        first = self._cell_start[cells]
+        counts = self._cell_start[cells + 1] - first
+        owner = np.repeat(cell_owner, counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        candidates = self._cell_order[np.repeat(first, counts) + offsets]
+        dist = haversine_km(lat[owner], lon[owner], self._lat[candidates], self._lon[candidates])
+
+        # Mínimo por consulta sobre su tramo contiguo del array plano
+        rows = np.full(len(lat), -1, dtype=np.int64)
+        best = np.full(len(lat), np.nan)
+        per_query = np.bincount(owner, minlength=len(lat))
+        has = per_query > 0
+        if has.any():
+            starts = (np.cumsum(per_query) - per_query)[has]
+            best[has] = np.minimum.reduceat(dist, starts)
+            hits = np.flatnonzero(dist == best[owner])
+            # Ante empates, el primer candidato de cada consulta
+            first_hit = hits[np.r_[True, owner[hits][1:] != owner[hits][:-1]]]
+            rows[owner[first_hit]] = candidates[first_hit]
+        return rows, best, whole_globe
+
+
+def _grid_cell(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Celda de 1° x 1° (fila de latitud * 360 + columna de longitud)."""
+    lat_cell = np.clip(np.floor(lat + 90.0), 0, _GRID_LAT_CELLS - 1).astype(np.int64)
+    lon_cell = np.floor(lon + 180.0).astype(np.int64) % _GRID_LON_CELLS
+    return lat_cell * _GRID_LON_CELLS + lon_cell
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+
+# Un tramo de más de 20 h de bloque no es plausible en este logbook
+MAX_BLOCK_MINUTES = 20 * 60
+
+FLAG_SIN_HORAS = "Salida/Llegada no válidas"
+FLAG_IMPOSIBLE = "Bloque imposible"
+FLAG_DIFERENCIA = "No cuadra con tiempo total"
+FLAG_SOLAPE = "Solapa con otro tramo"
+
+
+def clock_to_minutes(series: pd.Series | None, index: pd.Index | None = None) -> pd.Series:
+    """Convierte horas de reloj ("08:05", "0805", "8:05:00") a minutos desde medianoche.
+
+    Devuelve NaN donde el valor no es una hora válida.
+    """
+    if series is None:
+        return pd.Series(np.nan, index=index, dtype="float")
+    parts = series.astype("string").str.strip().str.extract(r"^(\d{1,2}):?(\d{2})(?::\d{2})?$")
+    h = pd.to_numeric(parts[0], errors="coerce")
+    m = pd.to_numeric(parts[1], errors="coerce")
+    minutes = (h * 60 + m).astype("float")
+    return minutes.where((h < 24) & (m < 60))
+
+
+def build_block_intervals(df: pd.DataFrame) -> pd.DataFrame:
+    """Reconstruye los intervalos de bloque a partir de ``Fecha`` + ``Salida``/``Llegada``.
+
+    Si la llegada es anterior a la salida se asume que el tramo cruza la medianoche.
+    El resultado conserva el índice de ``df``.
+    """
+    fecha = pd.to_datetime(df.get("Fecha"), errors="coerce", dayfirst=True)
+    if fecha is None:
+        fecha = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+    fecha = fecha.dt.normalize()
+
+    salida = clock_to_minutes(df.get("Salida"), df.index)
+    llegada = clock_to_minutes(df.get("Llegada"), df.index)
+    cruza_medianoche = llegada < salida
+
+    block_minutes = (llegada - salida).where(~cruza_medianoche, llegada + 24 * 60 - salida)
+    inicio = fecha + pd.to_timedelta(salida, unit="m")
+    fin = inicio + pd.to_timedelta(block_minutes, unit="m")
+
+    logged = df.get("Tiempo total de vuelo_horas")
+    logged_minutes = (
+        (pd.to_numeric(logged, errors="coerce").fillna(0.0) * 60).round()
+        if logged is not None
+        else pd.Series(0.0, index=df.index)
+    )
+
+    return pd.DataFrame(
+        {
+            "inicio_bloque": inicio,
+            "fin_bloque": fin,
+            "minutos_bloque": block_minutes,
+            "minutos_registrados": logged_minutes,
+            "cruza_medianoche": cruza_medianoche.fillna(False).astype(bool),
+        },
+        index=df.index,
+    )
+
+
+def find_overlaps(intervals: pd.DataFrame) -> pd.Series:
+    """Barrido ordenado (O(n log n)): para cada tramo que empieza antes de que termine
+    alguno anterior, devuelve la etiqueta de índice de ese tramo anterior; el tramo
+    anterior recibe a su vez la del primer tramo que lo solapa.
+
+    Los tramos sin solape (o sin intervalo válido) quedan a NaN.
+    """
+    valid = intervals.dropna(subset=["inicio_bloque", "fin_bloque"])
+    result = pd.Series(np.nan, index=intervals.index, dtype="object")
+    if len(valid) < 2:
+        return result
+
+    valid = valid.sort_values(["inicio_bloque", "fin_bloque"], kind="mergesort")
+    starts = valid["inicio_bloque"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    ends = valid["fin_bloque"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+
+    # Máximo fin visto hasta el tramo anterior y posición del tramo que lo alcanza
+    running_end = np.maximum.accumulate(ends)
+    positions = np.arange(len(ends))
+    owner = np.maximum.accumulate(np.where(ends == running_end, positions, 0))
+
+    prev_end = np.concatenate(([np.iinfo(np.int64).min], running_end[:-1]))
+    prev_owner = np.concatenate(([0], owner[:-1]))
+    overlap = starts < prev_end
+
+    labels = valid.index.to_numpy()
+    later = labels[overlap]
+    earlier = labels[prev_owner[overlap]]
+    result.loc[later] = earlier
+
+    # Marcar también el otro lado del conflicto (si no tiene ya su propio solape)
+    earlier_of = pd.Series(later, index=earlier)
+    earlier_of = earlier_of[~earlier_of.index.duplicated()]
+    pending = earlier_of.index[result.loc[earlier_of.index].isna().to_numpy()]
+    result.loc[pending] = earlier_of.loc[pending].to_numpy()
+    return result
+
+
+def check_block_times(df: pd.DataFrame, *, tolerance_minutes: int = 5) -> pd.DataFrame:
+    """Intervalos de bloque con sus incidencias (columna ``incidencias``, vacía si todo cuadra).
+
+    Solo se revisan las filas con vuelo (``Tiempo total de vuelo`` > 0).
+    """
+    intervals = build_block_intervals(df)
+    is_flight = intervals["minutos_registrados"] > 0
+    flights = intervals[is_flight].copy()
+
+    sin_horas = flights["minutos_bloque"].isna()
+    imposible = ~sin_horas & (
+        (flights["minutos_bloque"] <= 0) | (flights["minutos_bloque"] > MAX_BLOCK_MINUTES)
+    )
+    diferencia = (
+        ~sin_horas
+        & ~imposible
+        & ((flights["minutos_bloque"] - flights["minutos_registrados"]).abs() > tolerance_minutes)
+    )
+
+    solapa_con = find_overlaps(flights.loc[~imposible]).reindex(flights.index)
+    flights["solapa_con"] = solapa_con
+
+    flags = {
+        FLAG_SIN_HORAS: sin_horas,
+        FLAG_IMPOSIBLE: imposible,
+        FLAG_DIFERENCIA: diferencia,
+        FLAG_SOLAPE: solapa_con.notna(),
+    }
+    incidencias = pd.Series("", index=flights.index, dtype="object")
+    for name, mask in flags.items():
+        sep = np.where(incidencias == "", "", ", ")
+        incidencias = incidencias.where(~mask, incidencias + sep + name)
+    flights["incidencias"] = incidencias
+    return flights
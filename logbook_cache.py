@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+import functools
+import hashlib
+import inspect
+import pickle
+import sys
+import threading
+import time
+from typing import Any, Callable, Iterator
+
+import numpy as np
+import pandas as pd
+
+
+MB = 1024 * 1024
+
+
+@dataclass
+class _Entry:
+    value: Any
+    size: int
+    expires_at: float | None
+
+
+@dataclass
+class CacheStats:
+    name: str
+    entries: int = 0
+    bytes: int = 0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def estimate_size(value: Any, _seen: set[int] | None = None) -> int:
+    """Tamaño aproximado en memoria (bytes) de un valor cacheado."""
+    seen = _seen if _seen is not None else set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True, index=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(k, seen) + estimate_size(v, seen) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(v, seen) for v in value)
+    if hasattr(value, "__dict__"):
+        return sys.getsizeof(value) + estimate_size(vars(value), seen)
+    return sys.getsizeof(value)
+
+
+def _hash_value(hasher, value: Any) -> None:
+    if isinstance(value, pd.DataFrame):
+        hasher.update(repr((list(value.columns), [str(t) for t in value.dtypes], value.shape)).encode())
+        try:
+            hasher.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        except TypeError:
+            # Celdas no hashables (listas/dicts de Firestore): serializar
+            hasher.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    elif isinstance(value, (pd.Series, pd.Index)):
+        hasher.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    elif isinstance(value, np.ndarray):
+        hasher.update(repr((value.dtype, value.shape)).encode())
+        hasher.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (str, bytes, int, float, bool, type(None))):
+        hasher.update(repr((type(value).__name__, value)).encode())
+    elif isinstance(value, (list, tuple)):
+        hasher.update(f"{type(value).__name__}:{len(value)}".encode())
+        for v in value:
+            _hash_value(hasher, v)
+    elif isinstance(value, dict):
+        hasher.update(f"dict:{len(value)}".encode())
+        for k in sorted(value, key=repr):
+            _hash_value(hasher, k)
+            _hash_value(hasher, value[k])
+    else:
+        hasher.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _make_key(args: tuple, kwargs: dict) -> str:
+    hasher = hashlib.blake2b(digest_size=16)
+    _hash_value(hasher, args)
+    _hash_value(hasher, kwargs)
+    return hasher.hexdigest()
+
+
+class CacheManager:
+    """Caché de proceso con presupuesto total de memoria, compartida por todas las sesiones.
+
+    Todas las cachés registradas comparten un único LRU ponderado por tamaño: al
+    superar ``max_bytes`` se expulsan las entradas menos usadas de cualquier caché.
+    Cada caché puede tener su propio TTL. Los valores devueltos no se copian, así
+    que deben tratarse como de solo lectura. Como ``st.cache_data``, si varias
+    sesiones fallan a la vez en la misma clave solo una calcula el valor.
+    """
+
+    def __init__(self, max_bytes: int = 512 * MB):
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.RLock()
+        self._entries: OrderedDict[tuple[str, str], _Entry] = OrderedDict()
+        self._stats: dict[str, CacheStats] = {}
+        self._total_bytes = 0
+        # Lock de cálculo por clave: [lock, sesiones que lo usan]
+        self._compute_locks: dict[tuple[str, str], list] = {}
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def configure(self, *, max_bytes: int) -> None:
+        with self._lock:
+            self.max_bytes = int(max_bytes)
+            self._evict(0)
+
+    def cached(self, name: str | None = None, *, ttl: float | None = None) -> Callable:
+        """Decorador análogo a ``st.cache_data`` (clave = hash de los argumentos).
+
+        Igual que en Streamlit, los parámetros cuyo nombre empieza por ``_`` no
+        forman parte de la clave (objetos no hashables o caros de hashear).
+        """
+
+        def decorator(func: Callable) -> Callable:
+            cache_name = name or f"{func.__module__}.{func.__qualname__}"
+            signature = inspect.signature(func)
+            with self._lock:
+                self._stats.setdefault(cache_name, CacheStats(cache_name))
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                bound = signature.bind(*args, **kwargs).arguments
+                hashed = {k: v for k, v in bound.items() if not k.startswith("_")}
+                key = (cache_name, _make_key((), hashed))
+                found, value = self._get(key)
+                if found:
+                    return value
+                with self._compute_lock(key):
+                    # Otra sesión puede haberlo calculado mientras esperábamos el lock
+                    found, value = self._get(key, count_miss=False)
+                    if found:
+                        return value
+                    value = func(*args, **kwargs)
+                    self._put(key, value, ttl)
+                    return value
+
+            wrapper.clear = lambda: self.clear(cache_name)  # type: ignore[attr-defined]
+            return wrapper
+
+        return decorator
+
+    @contextmanager
+    def _compute_lock(self, key: tuple[str, str]) -> Iterator[None]:
+        with self._lock:
+            slot = self._compute_locks.setdefault(key, [threading.Lock(), 0])
+            slot[1] += 1
+        try:
+            with slot[0]:
+                yield
+        finally:
+            with self._lock:
+                slot[1] -= 1
+                if not slot[1]:
+                    del self._compute_locks[key]
+
+    def _get(self, key: tuple[str, str], *, count_miss: bool = True) -> tuple[bool, Any]:
+        with self._lock:
+            stats = self._stats[key[0]]
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                stats.expirations += 1
+                entry = None
+            if entry is None:
+                if count_miss:
+                    stats.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            stats.hits += 1
+            return True, entry.value
+
+    def _put(self, key: tuple[str, str], value: Any, ttl: float | None) -> None:
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            # No cabe ni vaciando la caché: no se guarda
+            with self._lock:
+                self._stats[key[0]].evictions += 1
+            return
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._evict(size)
+            self._entries[key] = _Entry(value=value, size=size, expires_at=expires_at)
+            self._total_bytes += size
+            stats = self._stats[key[0]]
+            stats.entries += 1
+            stats.bytes += size
+
+    def _remove(self, key: tuple[str, str]) -> None:
+        entry = self._entries.pop(key)
+        self._total_bytes -= entry.size
+        stats = self._stats[key[0]]
+        stats.entries -= 1
+        stats.bytes -= entry.size
+
+    def _evict(self, incoming: int) -> None:
+        # Primero lo caducado, después LRU global hasta que quepa ``incoming``
+        now = time.monotonic()
+        for key in [k for k, e in self._entries.items() if e.expires_at is not None and e.expires_at <= now]:
+            self._remove(key)
+            self._stats[key[0]].expirations += 1
+        while self._entries and self._total_bytes + incoming > self.max_bytes:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self._stats[key[0]].evictions += 1
+
+    def clear(self, name: str | None = None) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if name is None or k[0] == name]:
+                self._remove(key)
+
+    def stats(self) -> list[CacheStats]:
+        with self._lock:
+            return [CacheStats(**vars(s)) for s in self._stats.values()]
+
+
+# Instancia global del proceso (como las cachés de Streamlit)
+cache_manager = CacheManager()
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import threading
+from typing import Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+# Dimensiones del cubo, de la más gruesa a la más fina
+CUBE_DIMENSIONS: tuple[str, ...] = (
+    "Año",
+    "Mes",
+    "Fabricante",
+    "Matrícula",
+    "Nombre del PIC",
+    "Función",
+    "Reglas",
+    "Día/Noche",
+)
+
+# Función a bordo (dimensión derivada): la columna de rol con más horas en el tramo
+ROLE_COLUMNS: dict[str, str] = {
+    "Piloto al mando": "Piloto al mando_horas",
+    "Co-piloto": "Co-piloto_horas",
+    "Doble mando": "Doble mando_horas",
+    "Instructor": "Instructor_horas",
+}
+
+# Medidas de horas: nombre en el cubo -> columna *_horas del DataFrame normalizado
+HOURS_MEASURES: dict[str, str] = {
+    "Horas vuelo": "Tiempo total de vuelo_horas",
+    "Noche": "Noche_horas",
+    "IFR": "IFR_horas",
+    "Piloto al mando": "Piloto al mando_horas",
+    "Co-piloto": "Co-piloto_horas",
+    "Doble mando": "Doble mando_horas",
+    "Instructor": "Instructor_horas",
+    "Horas simulador": "Total de sesión_horas",
+}
+
+# Medidas de conteo (se suman igual que las horas al hacer roll-up)
+COUNT_MEASURES: tuple[str, ...] = ("Vuelos", "Sesiones simulador")
+
+MISSING_LABEL = "(sin dato)"
+
+# Roll-ups memorizados por cubo; el cubo vive en cache_manager, que solo conoce su
+# tamaño al guardarlo, así que la memoria extra debe quedar acotada
+MAX_MEMO_ROLLUPS = 32
+
+
+@dataclass(frozen=True)
+class HoursCube:
+    """Cubo de horas precalculado al nivel más fino (todas las dimensiones).
+
+    Las consultas agregan sobre ``base`` (una fila por combinación existente),
+    no sobre el logbook original, por eso son casi instantáneas.
+    """
+
+    base: pd.DataFrame
+    dimensions: tuple[str, ...] = CUBE_DIMENSIONS
+    measures: tuple[str, ...] = COUNT_MEASURES + tuple(HOURS_MEASURES)
+    _rollups: OrderedDict = field(default_factory=OrderedDict, compare=False, repr=False)
+    # El cubo se comparte entre sesiones (cache_manager): el memo necesita lock
+    _rollups_lock: threading.Lock = field(default_factory=threading.Lock, compare=False, repr=False)
+
+    def values(self, dimension: str) -> list:
+        """Valores distintos de una dimensión, ordenados."""
+        return sorted(self.base[dimension].dropna().unique().tolist(), key=str)
+
+    def rollup(
+        self,
+        dimensions: Sequence[str],
+        filters: Mapping[str, object] | None = None,
+    ) -> pd.DataFrame:
+        """Agrega las medidas por ``dimensions`` tras fijar los valores de ``filters``."""
+        dims = tuple(dimensions)
+        unknown = [d for d in (*dims, *(filters or {})) if d not in self.dimensions]
+        if unknown:
+            raise ValueError(f"Dimensiones desconocidas: {unknown}")
+
+        key = (dims, tuple(sorted((filters or {}).items(), key=lambda kv: kv[0])))
+        with self._rollups_lock:
+            cached = self._rollups.get(key)
+            if cached is not None:
+                self._rollups.move_to_end(key)
+        if cached is not None:
+            return cached.copy()
+
+        base = self.base
+        if filters:
+            mask = pd.Series(True, index=base.index)
+            for dim, value in filters.items():
+                mask &= base[dim] == value
+            base = base.loc[mask]
+
+        measures = list(self.measures)
+        if dims:
+            result = (
+                base.groupby(list(dims), observed=True, sort=True)[measures]
+                .sum()
+                .reset_index()
+            )
+        else:
+            result = base[measures].sum().to_frame().T.astype(base[measures].dtypes.to_dict())
+
+        with self._rollups_lock:
+            self._rollups[key] = result
+            while len(self._rollups) > MAX_MEMO_ROLLUPS:
+                self._rollups.popitem(last=False)
+        return result.copy()
+
+    def drill_down(self, path: Mapping[str, object], next_dimension: str) -> pd.DataFrame:
+        """Baja un nivel: fija ``path`` (dimensión -> valor) y desglosa por ``next_dimension``."""
+        return self.rollup([*path, next_dimension], filters=path)
+
+    def pivot(
+        self,
+        rows: Sequence[str],
+        column: str | None,
+        measure: str,
+        filters: Mapping[str, object] | None = None,
+    ) -> pd.DataFrame:
+        """Tabla dinámica de una medida: ``rows`` en filas y ``column`` en columnas."""
+        if measure not in self.measures:
+            raise ValueError(f"Medida desconocida: {measure}")
+        dims = [*rows, column] if column else list(rows)
+        data = self.rollup(dims, filters=filters)
+        if not column:
+            return data[[*rows, measure]] if rows else data[[measure]]
+        return data.pivot_table(
+            index=list(rows) or None,
+            columns=column,
+            values=measure,
+            aggfunc="sum",
+            fill_value=0,
+            observed=True,
+        )
+
+
+def build_hours_cube(df: pd.DataFrame) -> HoursCube:
+    """Construye el cubo a partir del logbook normalizado (requiere ``_fecha_ref``)."""
+    fecha = pd.to_datetime(df.get("_fecha_ref"), errors="coerce")
+    if fecha is None:
+        fecha = pd.Series(pd.NaT, index=df.index)
+
+    facts = pd.DataFrame(index=df.index)
+    facts["Año"] = fecha.dt.year.astype("Int64")
+    facts["Mes"] = fecha.dt.month.astype("Int64")
+    for dim in ("Fabricante", "Matrícula", "Nombre del PIC"):
+        if dim in df.columns:
+            values = df[dim].astype("string").str.strip()
+            facts[dim] = values.mask(values.isna() | (values == ""), MISSING_LABEL)
+        else:
+            facts[dim] = MISSING_LABEL
+
+    for measure, column in HOURS_MEASURES.items():
+        if column in df.columns:
+            facts[measure] = pd.to_numeric(df[column], errors="coerce").fillna(0.0)
+        else:
+            facts[measure] = 0.0
+
+    # Dimensiones derivadas de las horas; sin horas de vuelo (simulador) quedan sin dato
+    flown = facts["Horas vuelo"] > 0
+    role_hours = facts[list(ROLE_COLUMNS)].to_numpy()
+    role = pd.Series(np.array(list(ROLE_COLUMNS), dtype=object)[role_hours.argmax(axis=1)], index=facts.index)
+    facts["Función"] = role.where(role_hours.max(axis=1) > 0, MISSING_LABEL)
+    facts["Reglas"] = np.where(facts["IFR"] > 0, "IFR", "VFR")
+    facts["Día/Noche"] = np.where(facts["Noche"] > 0, "Noche", "Día")
+    facts.loc[~flown, ["Reglas", "Día/Noche"]] = MISSING_LABEL
+
+    facts["Vuelos"] = flown.astype("int64")
+    facts["Sesiones simulador"] = (facts["Horas simulador"] > 0).astype("int64")
+
+    # Filas sin fecha de referencia (documentos vacíos) no aportan al cubo
+    facts = facts[facts["Año"].notna()]
+
+    for dim in CUBE_DIMENSIONS:
+        facts[dim] = facts[dim].astype("category")
+
+    measures = list(COUNT_MEASURES) + list(HOURS_MEASURES)
+    base = (
+        facts.groupby(list(CUBE_DIMENSIONS), observed=True, sort=True)[measures]
+        .sum()
+        .reset_index()
+    )
+    return HoursCube(base=base)
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import datetime as dt
+import io
+from typing import BinaryIO, Iterator
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from logbook_airports import AirportResolver
+from logbook_blocks import clock_to_minutes
+
+
+# Columnas de texto: nombre en el logbook -> nombre canónico en el export
+TEXT_COLUMNS: dict[str, str] = {
+    "Origen": "origen",
+    "Destino": "destino",
+    "Fabricante": "fabricante",
+    "Matrícula": "matricula",
+    "Nombre del PIC": "nombre_pic",
+    "Tipo": "tipo_simulador",
+    "Observaciones": "observaciones",
+}
+
+# Duraciones -> minutos enteros (a partir de las columnas <col>_horas de la carga)
+DURATION_COLUMNS: dict[str, str] = {
+    "SE": "se_min",
+    "ME": "me_min",
+    "Tiempo multipiloto": "multipiloto_min",
+    "Tiempo total de vuelo": "tiempo_total_min",
+    "Noche": "noche_min",
+    "IFR": "ifr_min",
+    "Piloto al mando": "piloto_al_mando_min",
+    "Co-piloto": "copiloto_min",
+    "Doble mando": "doble_mando_min",
+    "Instructor": "instructor_min",
+    "Total de sesión": "sesion_simulador_min",
+}
+
+COUNT_COLUMNS: dict[str, str] = {
+    "Landings día": "landings_dia",
+    "Landings Noche": "landings_noche",
+}
+
+EXPORT_SCHEMA = pa.schema(
+    [
+        pa.field("doc_id", pa.string()),
+        pa.field("doc_num", pa.int64()),
+        pa.field("fecha", pa.date32()),
+        pa.field("fecha_simu", pa.date32()),
+        pa.field("fecha_ref", pa.date32()),
+        pa.field("salida_min", pa.int16()),
+        pa.field("llegada_min", pa.int16()),
+        *(pa.field(name, pa.string()) for name in TEXT_COLUMNS.values()),
+        pa.field("origen_icao", pa.string()),
+        pa.field("origen_lat", pa.float64()),
+        pa.field("origen_lon", pa.float64()),
+        pa.field("destino_icao", pa.string()),
+        pa.field("destino_lat", pa.float64()),
+        pa.field("destino_lon", pa.float64()),
+        *(pa.field(name, pa.int32()) for name in DURATION_COLUMNS.values()),
+        *(pa.field(name, pa.int16()) for name in COUNT_COLUMNS.values()),
+    ]
+)
+
+
+def hours_to_minutes(hours: pd.Series | None, index: pd.Index) -> pd.Series:
+    """Columna ``*_horas`` de ``ingest_documents`` -> minutos enteros (vacíos -> 0)."""
+    if hours is None:
+        return pd.Series(0, index=index, dtype="int32")
+    minutes = (pd.to_numeric(hours, errors="coerce") * 60).round().fillna(0)
+    return minutes.clip(lower=0).astype("int32")
+
+
+def _dates(values: pd.Series | None, index: pd.Index) -> pd.Series:
+    """Fechas ya parseadas al cargar (``date``/datetime64); nunca se vuelve a parsear texto."""
+    if values is None:
+        return pd.Series(pd.NaT, index=index, dtype="datetime64[ns]")
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        # Fecha: objetos date o None; cualquier otro valor queda como NaT
+        values = values.map(lambda v: v if isinstance(v, dt.date) else None)
+    return pd.to_datetime(values).dt.normalize()
+
+
+def normalize_for_export(df: pd.DataFrame, resolver: AirportResolver | None = None) -> pd.DataFrame:
+    """Frame normalizado: nombres canónicos, fechas parseadas, duraciones en minutos
+    y coordenadas de ruta (si se proporciona ``resolver``).
+
+    ``df`` es la salida de ``ingest_documents``: fechas y duraciones se toman de
+    las columnas ya parseadas (``Fecha``, ``_fecha_simu``, ``_fecha_ref``, ``*_horas``).
+    """
+    idx = df.index
+    out = pd.DataFrame(index=idx)
+
+    out["doc_id"] = df.get("_doc_id", pd.Series(pd.NA, index=idx)).astype("string")
+    out["doc_num"] = pd.to_numeric(df.get("_doc_num", pd.Series(np.nan, index=idx)), errors="coerce").astype("Int64")
+
+    out["fecha"] = _dates(df.get("Fecha"), idx)
+    out["fecha_simu"] = _dates(df.get("_fecha_simu"), idx)
+    out["fecha_ref"] = _dates(df.get("_fecha_ref"), idx)
+
+    out["salida_min"] = clock_to_minutes(df.get("Salida"), idx).astype("Int16")
+    out["llegada_min"] = clock_to_minutes(df.get("Llegada"), idx).astype("Int16")
+
+    for source, name in TEXT_COLUMNS.items():
+        values = df[source].astype("string").str.strip() if source in df.columns else pd.Series(pd.NA, index=idx, dtype="string")
+        out[name] = values.mask(values == "")
+
+    for prefix, source in (("origen", "Origen"), ("destino", "Destino")):
+        if resolver is not None and source in df.columns:
+            resolved = resolver.resolve(df[source])
+            out[f"{prefix}_icao"] = resolved["ICAO"].astype("string")
+            out[f"{prefix}_lat"] = resolved["lat"].astype(float)
+            out[f"{prefix}_lon"] = resolved["lon"].astype(float)
+        else:
+            out[f"{prefix}_icao"] = pd.Series(pd.NA, index=idx, dtype="string")
+            out[f"{prefix}_lat"] = np.nan
+            out[f"{prefix}_lon"] = np.nan
+
+    for source, name in DURATION_COLUMNS.items():
+        out[name] = hours_to_minutes(df.get(source + "_horas"), idx)
+
+    for source, name in COUNT_COLUMNS.items():
+        counts = pd.to_numeric(df.get(source, pd.Series(0, index=idx)), errors="coerce").fillna(0)
+        out[name] = counts.round().astype("int16")
+
+    return out[EXPORT_SCHEMA.names]
+
+
+def iter_record_batches(
+    df: pd.DataFrame,
+    resolver: AirportResolver | None = None,
+    *,
+    chunk_size: int = 50_000,
+) -> Iterator[pa.RecordBatch]:
+    """Normaliza y convierte a Arrow por bloques de ``chunk_size`` filas."""
+    for start in range(0, len(df), chunk_size):
+        chunk = normalize_for_export(df.iloc[start:start + chunk_size], resolver)
+        yield pa.RecordBatch.from_pandas(chunk, schema=EXPORT_SCHEMA, preserve_index=False)
+
+
+def write_parquet(
+    df: pd.DataFrame,
+    sink: str | BinaryIO,
+    resolver: AirportResolver | None = None,
+    *,
+    chunk_size: int = 50_000,
+) -> None:
+    """Parquet con un row group por bloque."""
+    with pq.ParquetWriter(sink, EXPORT_SCHEMA, compression="zstd") as writer:
+        for batch in iter_record_batches(df, resolver, chunk_size=chunk_size):
+            writer.write_batch(batch)
+
+
+def write_arrow_ipc(
+    df: pd.DataFrame,
+    sink: str | BinaryIO,
+    resolver: AirportResolver | None = None,
+    *,
+    chunk_size: int = 50_000,
+) -> None:
+    """Arrow IPC (formato fichero, sin compresión) para poder leerlo con memory map."""
+    with pa.ipc.new_file(sink, EXPORT_SCHEMA) as writer:
+        for batch in iter_record_batches(df, resolver, chunk_size=chunk_size):
+            writer.write_batch(batch)
+
+
+def export_bytes(df: pd.DataFrame, fmt: str, resolver: AirportResolver | None = None) -> bytes:
+    """Export en memoria (``fmt`` = "parquet" o "arrow") para descargas."""
+    buf = io.BytesIO()
+    if fmt == "parquet":
+        write_parquet(df, buf, resolver)
+    elif fmt == "arrow":
+        write_arrow_ipc(df, buf, resolver)
+    else:
+        raise ValueError(f"Formato de export no soportado: {fmt}")
+    return buf.getvalue()
+
+
+def read_arrow_ipc(path: str) -> pa.Table:
+    """Lee un export Arrow IPC con memory map (sin copiar los buffers a memoria)."""
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all()
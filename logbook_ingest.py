@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass, field
+import datetime as dt
+import math
+from typing import Any, Iterable
+
+import numpy as np
+import pandas as pd
+
+
+# Nombres normalizados (sin espacios extra, minúsculas, "_"/"-" como espacio) -> columna canónica
+CANONICAL_COLUMNS: dict[str, str] = {
+    "fecha": "Fecha",
+    "fecha simu": "Fecha simu",
+    "tiempo total de vuelo": "Tiempo total de vuelo",
+    "noche": "Noche",
+    "ifr": "IFR",
+    "total de sesion": "Total de sesión",
+    "piloto al mando": "Piloto al mando",
+    "co piloto": "Co-piloto",
+    "doble mando": "Doble mando",
+    "instructor": "Instructor",
+    "se": "SE",
+    "me": "ME",
+    "tiempo multipiloto": "Tiempo multipiloto",
+}
+
+# Columnas con duración (hh:mm u horas decimales) que también se guardan como <col>_horas
+DURATION_FIELDS: tuple[str, ...] = (
+    "SE",
+    "ME",
+    "Tiempo multipiloto",
+    "Tiempo total de vuelo",
+    "Noche",
+    "IFR",
+    "Total de sesión",
+    "Piloto al mando",
+    "Co-piloto",
+    "Doble mando",
+    "Instructor",
+)
+
+DATE_FIELDS: tuple[str, ...] = ("Fecha", "Fecha simu")
+
+# Ejemplos de valores no válidos que se guardan por campo en el informe
+MAX_FAILURE_EXAMPLES = 5
+
+# Mismo rango que admite pandas para fechas (datetime64[ns])
+_MIN_DATE = pd.Timestamp.min.date()
+_MAX_DATE = pd.Timestamp.max.date()
+
+_CURRENT_YEAR = dt.date.today().year
+
+# "-" y "." se tratan como "/" al separar día, mes y año
+_DATE_SEPARATORS = str.maketrans({"-": "/", ".": "/"})
+
+
+def _norm_name(name: str) -> str:
+    return str(name).replace("_", " ").replace("-", " ").strip().casefold()
+
+
+def _is_blank(value: Any) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, float) and math.isnan(value):
+        return True
+    return isinstance(value, str) and value.strip() == ""
+
+
+def parse_hours(value: Any) -> float:
+    """"01:54" -> 1.9, "1,5" -> 1.5. Lanza ValueError si el valor no se puede interpretar."""
+    txt = str(value).strip()
+    # Formato hh:mm (por ejemplo "01:54")
+    if ":" in txt:
+        parts = txt.split(":")
+        h = int(parts[0]) if len(parts) > 0 else 0
+        m = int(parts[1]) if len(parts) > 1 else 0
+        return float(h) + float(m) / 60.0
+    # Número de horas (1.5 -> 1.5 h)
+    hours = float(txt.replace(",", "."))
+    if not math.isfinite(hours):
+        raise ValueError(txt)
+    return hours
+
+
+def _expand_year(year: str) -> int:
+    """Años de 2 dígitos como pandas/dateutil: el siglo que deja el año a menos de 50 del actual."""
+    value = int(year)
+    if len(year) != 2:
+        return value
+    value += _CURRENT_YEAR - _CURRENT_YEAR % 100
+    if value >= _CURRENT_YEAR + 50:
+        value -= 100
+    elif value < _CURRENT_YEAR - 50:
+        value += 100
+    return value
+
+
+def _date_from_parts(txt: str, year: str, month: str, day: str) -> dt.date:
+    if len(year) not in (2, 4) or not (year.isdigit() and month.isdigit() and day.isdigit()):
+        raise ValueError(txt)
+    return dt.date(_expand_year(year), int(month), int(day))
+
+
+def parse_date(value: Any) -> dt.date:
+    """Acepta timestamps de Firestore, ``date`` o texto con día primero (dd/mm/YYYY,
+    dd-mm-YYYY, dd.mm.YYYY, dd/mm/yy) o ISO con el año primero (YYYY-MM-DD).
+
+    Una hora al final ("01/03/2021 10:00") se ignora. Cualquier otro texto lanza
+    ValueError (y se registra como fallo) en lugar de adivinar el orden.
+    """
+    if isinstance(value, dt.datetime):
+        parsed = value.date()
+    elif isinstance(value, dt.date):
+        parsed = value
+    else:
+        txt = str(value).strip()
+        # Split en lugar de strptime: mucho más barato y con el orden de campos fijo
+        date_txt = txt.split(" ", 1)[0].split("T", 1)[0]
+        parts = date_txt.translate(_DATE_SEPARATORS).split("/")
+        if len(parts) != 3:
+            raise ValueError(txt)
+        if len(parts[0]) == 4:
+            parsed = _date_from_parts(txt, parts[0], parts[1], parts[2])
+        else:
+            parsed = _date_from_parts(txt, parts[2], parts[1], parts[0])
+    if not (_MIN_DATE < parsed < _MAX_DATE):
+        raise ValueError(str(value))
+    return parsed
+
+
+# Marca en el memo de un valor que no se pudo parsear
+_PARSE_FAILED = object()
+
+
+def _memoized(parser, cache: dict):
+    """Los valores se repiten mucho (mismas fechas y duraciones): parsear cada texto una vez.
+
+    Los fallos se memorizan con una marca y se lanza un ValueError nuevo en cada
+    acierto: guardar la excepción acumularía traceback y crearía un ciclo de
+    referencias con el frame de ``ingest_documents`` (búferes vivos hasta el GC).
+    """
+
+    def parse(value):
+        if not isinstance(value, str):
+            return parser(value)
+        try:
+            result = cache[value]
+        except KeyError:
+            try:
+                result = parser(value)
+            except (ValueError, TypeError, OverflowError):
+                result = _PARSE_FAILED
+            cache[value] = result
+        if result is _PARSE_FAILED:
+            raise ValueError(value)
+        return result
+
+    return parse
+
+
+@dataclass
+class IngestReport:
+    documents: int = 0
+    parse_failures: dict[str, int] = field(default_factory=dict)
+    failure_examples: dict[str, list[tuple[str, str]]] = field(default_factory=dict)
+
+    @property
+    def total_failures(self) -> int:
+        return sum(self.parse_failures.values())
+
+    def record_failure(self, field_name: str, doc_id: str, value: Any) -> None:
+        self.parse_failures[field_name] = self.parse_failures.get(field_name, 0) + 1
+        examples = self.failure_examples.setdefault(field_name, [])
+        if len(examples) < MAX_FAILURE_EXAMPLES:
+            examples.append((doc_id, str(value)))
+
+
+class _ColumnBuffer:
+    """Valores de una columna con la fila en la que aparecen (las columnas son dispersas)."""
+
+    __slots__ = ("rows", "values")
+
+    def __init__(self):
+        self.rows = array("q")
+        self.values: list = []
+
+
+def ingest_documents(docs: Iterable) -> tuple[pd.DataFrame, IngestReport]:
+    """Construye el DataFrame del logbook en una sola pasada sobre los documentos.
+
+    Normaliza los nombres de campo al vuelo, parsea fechas y duraciones a búferes
+    tipados, calcula ``_fecha_simu`` y ``_fecha_ref`` (Fecha o, si falta, Fecha simu)
+    y ordena por ID de documento sin materializar una lista intermedia de dicts.
+    """
+    report = IngestReport()
+    columns: dict[str, _ColumnBuffer] = {}
+    key_cache: dict[str, str] = {}
+    doc_ids: list[str] = []
+
+    hours_buffers = {f: (array("q"), array("d")) for f in DURATION_FIELDS}
+    date_buffers = {f: (array("q"), []) for f in DATE_FIELDS}
+    parse_hours_cached = _memoized(parse_hours, {})
+    parse_date_cached = _memoized(parse_date, {})
+
+    for row, doc in enumerate(docs):
+        doc_id = str(doc.id)
+        doc_ids.append(doc_id)
+        for raw_key, value in (doc.to_dict() or {}).items():
+            col = key_cache.get(raw_key)
+            if col is None:
+                col = CANONICAL_COLUMNS.get(_norm_name(raw_key), raw_key)
+                key_cache[raw_key] = col
+
+            buffer = columns.get(col)
+            if buffer is None:
+                buffer = columns[col] = _ColumnBuffer()
+            elif buffer.rows and buffer.rows[-1] == row:
+                # Dos claves del mismo documento con el mismo nombre canónico
+                continue
+
+            # Solo fechas y duraciones se parsean; el resto se guarda tal cual
+            if col in date_buffers:
+                if _is_blank(value):
+                    value = None if col == "Fecha" else value
+                else:
+                    try:
+                        parsed = parse_date_cached(value)
+                        date_rows, date_values = date_buffers[col]
+                        date_rows.append(row)
+                        date_values.append(parsed)
+                    except (ValueError, TypeError, OverflowError):
+                        report.record_failure(col, doc_id, value)
+                        parsed = None
+                    if col == "Fecha":
+                        # Fecha se guarda ya convertida; Fecha simu conserva el texto original
+                        value = parsed
+            elif col in hours_buffers and not _is_blank(value):
+                try:
+                    hours = parse_hours_cached(value)
+                except (ValueError, TypeError, OverflowError):
+                    report.record_failure(col, doc_id, value)
+                    hours = 0.0
+                hours_rows, hours_values = hours_buffers[col]
+                hours_rows.append(row)
+                hours_values.append(hours)
+
+            if value is not None:
+                buffer.rows.append(row)
+                buffer.values.append(value)
+
+    n = len(doc_ids)
+    report.documents = n
+    if n == 0:
+        return pd.DataFrame(), report
+
+    # Orden del logbook: ID numérico (0000..), después ID de texto y orden de llegada
+    doc_id_arr = np.array(doc_ids, dtype=object)
+    doc_num = pd.to_numeric(pd.Series(doc_id_arr), errors="coerce").to_numpy()
+    order = (
+        pd.DataFrame({"_doc_num": doc_num, "_doc_id": doc_id_arr, "_row_order": np.arange(n)})
+        .sort_values(by=["_doc_num", "_doc_id", "_row_order"], ascending=True, na_position="last")
+        .index.to_numpy()
+    )
+
+    # Posición final de cada fila: los valores se escriben directamente ya ordenados
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n)
+
+    data: dict[str, Any] = {}
+    for col in list(columns):
+        buffer = columns.pop(col)
+        values = np.full(n, None, dtype=object)
+        # fromiter evita que NumPy interprete listas/dicts de Firestore como dimensiones
+        values[rank[np.frombuffer(buffer.rows, dtype=np.int64)]] = np.fromiter(
+            buffer.values, dtype=object, count=len(buffer.values)
+        )
+        data[col] = values
+        del buffer
+
+    # Fecha siempre existe aunque ningún documento la tenga (solo simulador)
+    data.setdefault("Fecha", np.full(n, None, dtype=object))
+
+    data["_doc_id"] = doc_id_arr[order]
+    data["_row_order"] = order
+    data["_doc_num"] = doc_num[order]
+
+    for col, (rows, values) in hours_buffers.items():
+        if col not in data:
+            continue
+        hours = np.zeros(n, dtype=float)
+        hours[rank[np.frombuffer(rows, dtype=np.int64)]] = np.frombuffer(values, dtype=float)
+        data[col + "_horas"] = hours
+
+    def _date_column(col: str) -> np.ndarray:
+        rows, values = date_buffers[col]
+        dates = np.full(n, np.datetime64("NaT"), dtype="datetime64[ns]")
+        if rows:
+            dates[rank[np.frombuffer(rows, dtype=np.int64)]] = np.array(values, dtype="datetime64[D]")
+        return dates
+
+    # Fecha simu conserva el texto original (PDF); la fecha parseada va aparte
+    fecha_simu = _date_column("Fecha simu")
+    fecha = _date_column("Fecha")
+    data["_fecha_simu"] = fecha_simu
+    data["_fecha_ref"] = np.where(np.isnat(fecha), fecha_simu, fecha)
+
+    # Columnas homogéneas (p. ej. landings numéricos) pasan de object a su tipo real
+    return pd.DataFrame(data, copy=False).infer_objects(), report
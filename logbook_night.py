@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from logbook_airports import AirportResolver
+from logbook_blocks import build_block_intervals
+
+
+# Noche (EASA): entre el fin del crepúsculo civil vespertino y el inicio del matutino
+NIGHT_SUN_ELEVATION_DEG = -6.0
+
+_J2000_UNIX_DAYS = 10957.5  # 2000-01-01 12:00 UTC en días desde 1970-01-01
+
+
+def solar_elevation(lat_deg: np.ndarray, lon_deg: np.ndarray, unix_seconds: np.ndarray) -> np.ndarray:
+    """Elevación del sol en grados (aproximación del Almanaque, ~0.1°), vectorizada.
+
+    Todas las entradas se difunden entre sí (broadcasting de NumPy); las horas son UTC.
+    """
+    d = np.asarray(unix_seconds, dtype=float) / 86400.0 - _J2000_UNIX_DAYS
+
+    g = np.radians(357.529 + 0.98560028 * d)
+    q = 280.459 + 0.98564736 * d
+    ecl_lon = np.radians(q + 1.915 * np.sin(g) + 0.020 * np.sin(2 * g))
+    obliquity = np.radians(23.439 - 0.00000036 * d)
+
+    right_ascension = np.arctan2(np.cos(obliquity) * np.sin(ecl_lon), np.cos(ecl_lon))
+    declination = np.arcsin(np.sin(obliquity) * np.sin(ecl_lon))
+    gmst = np.radians(280.46061837 + 360.98564736629 * d)
+    hour_angle = gmst + np.radians(lon_deg) - right_ascension
+
+    lat = np.radians(lat_deg)
+    sin_elev = np.sin(lat) * np.sin(declination) + np.cos(lat) * np.cos(declination) * np.cos(hour_angle)
+    return np.degrees(np.arcsin(np.clip(sin_elev, -1.0, 1.0)))
+
+
+def _great_circle_points(
+    lat0: np.ndarray, lon0: np.ndarray, lat1: np.ndarray, lon1: np.ndarray, fractions: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Puntos sobre el círculo máximo: (legs,) x (samples,) -> (legs, samples)."""
+    def _unit(lat, lon):
+        lat, lon = np.radians(lat), np.radians(lon)
+        return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+    p0 = _unit(lat0, lon0)[:, None, :]
+    p1 = _unit(lat1, lon1)[:, None, :]
+    omega = np.arccos(np.clip(np.sum(p0 * p1, axis=-1), -1.0, 1.0))  # (legs, 1)
+    sin_omega = np.sin(omega)
+
+    f = fractions[None, :]
+    # Tramos muy cortos (o mismo aeropuerto): interpolación lineal
+    small = sin_omega < 1e-9
+    safe = np.where(small, 1.0, sin_omega)
+    w0 = np.where(small, 1.0 - f, np.sin((1.0 - f) * omega) / safe)
+    w1 = np.where(small, f, np.sin(f * omega) / safe)
+    p = w0[..., None] * p0 + w1[..., None] * p1
+
+    lat = np.degrees(np.arctan2(p[..., 2], np.hypot(p[..., 0], p[..., 1])))
+    lon = np.degrees(np.arctan2(p[..., 1], p[..., 0]))
+    return lat, lon
+
+
+def night_fraction(
+    lat0: np.ndarray,
+    lon0: np.ndarray,
+    lat1: np.ndarray,
+    lon1: np.ndarray,
+    start_unix: np.ndarray,
+    end_unix: np.ndarray,
+    *,
+    samples_per_leg: int = 64,
+) -> np.ndarray:
+    """Fracción de cada tramo volada de noche, muestreando ``samples_per_leg`` puntos."""
+    fractions = (np.arange(samples_per_leg) + 0.5) / samples_per_leg
+    lat, lon = _great_circle_points(lat0, lon0, lat1, lon1, fractions)
+    when = start_unix[:, None] + (end_unix - start_unix)[:, None] * fractions[None, :]
+    return np.mean(solar_elevation(lat, lon, when) < NIGHT_SUN_ELEVATION_DEG, axis=1)
+
+
+def compute_night_minutes(
+    df: pd.DataFrame,
+    airports: pd.DataFrame | AirportResolver,
+    *,
+    samples_per_leg: int = 64,
+    chunk_size: int = 8192,
+) -> pd.DataFrame:
+    """Minutos de noche calculados por tramo frente al valor registrado en ``Noche``.
+
+    ``airports`` es un :class:`AirportResolver` o un DataFrame con columnas ``ICAO``,
+    ``lat`` y ``lon`` (opcionalmente ``IATA`` y ``City``). Los tramos sin
+    coordenadas o sin Salida/Llegada válidas quedan con NaN en el cálculo.
+    """
+    intervals = build_block_intervals(df)
+
+    resolver = airports if isinstance(airports, AirportResolver) else AirportResolver(airports)
+    empty = pd.Series(index=df.index, dtype="object")
+    origen = resolver.resolve(df.get("Origen", empty))
+    destino = resolver.resolve(df.get("Destino", empty))
+    lat0 = origen["lat"].to_numpy(dtype=float)
+    lon0 = origen["lon"].to_numpy(dtype=float)
+    lat1 = destino["lat"].to_numpy(dtype=float)
+    lon1 = destino["lon"].to_numpy(dtype=float)
+
+    start = intervals["inicio_bloque"].to_numpy(dtype="datetime64[ns]")
+    end = intervals["fin_bloque"].to_numpy(dtype="datetime64[ns]")
+    block_minutes = intervals["minutos_bloque"].to_numpy(dtype=float)
+
+    valid = (
+        ~np.isnan(lat0) & ~np.isnan(lon0) & ~np.isnan(lat1) & ~np.isnan(lon1)
+        & ~np.isnat(start) & ~np.isnat(end) & (block_minutes > 0)
+    )
+    valid_idx = np.flatnonzero(valid)
+    start_unix = start[valid_idx].astype("datetime64[s]").astype(np.int64).astype(float)
+    end_unix = end[valid_idx].astype("datetime64[s]").astype(np.int64).astype(float)
+
+    fraction = np.full(len(df), np.nan)
+    # Por bloques para acotar memoria: (chunk_size x samples_per_leg) puntos a la vez
+    for lo in range(0, len(valid_idx), chunk_size):
+        sl = slice(lo, lo + chunk_size)
+        idx = valid_idx[sl]
+        fraction[idx] = night_fraction(
+            lat0[idx], lon0[idx], lat1[idx], lon1[idx],
+            start_unix[sl], end_unix[sl],
+            samples_per_leg=samples_per_leg,
+        )
+
+    calculated = np.round(fraction * block_minutes)
+    logged = df.get("Noche_horas")
+    logged_minutes = (
+        (pd.to_numeric(logged, errors="coerce").fillna(0.0) * 60).round().to_numpy()
+        if logged is not None
+        else np.zeros(len(df))
+    )
+
+    return pd.DataFrame(
+        {
+            "minutos_bloque": block_minutes,
+            "minutos_noche_calculados": calculated,
+            "minutos_noche_registrados": logged_minutes,
+            "diferencia_noche": calculated - logged_minutes,
+        },
+        index=df.index,
+    )
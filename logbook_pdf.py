@@ -27,6 +27,27 @@ class Layout:
     acumulado_con_pagina: tuple[float, float] | None = None
 
 
+@dataclass(frozen=True)
+class PdfSizeReport:
+    pages: int
+    standard_bytes: int
+    compact_bytes: int
+
+    @property
+    def standard_bytes_per_page(self) -> float:
+        return self.standard_bytes / self.pages if self.pages else 0.0
+
+    @property
+    def compact_bytes_per_page(self) -> float:
+        return self.compact_bytes / self.pages if self.pages else 0.0
+
+    @property
+    def saving_ratio(self) -> float:
+        if not self.standard_bytes:
+            return 0.0
+        return 1.0 - (self.compact_bytes / self.standard_bytes)
+
+
 DEFAULT_LAYOUT = Layout(
     y_top=52.441,
     y_bottom=344.761,
@@ -199,10 +220,15 @@ def generate_logbook_pdf_bytes(
     max_font_size: int = 10,
     min_font_size: int = 6,
     cell_padding: float = 2.0,
+    compact: bool = False,
 ) -> bytes:
     """Genera un PDF rellenado sobre una plantilla plana, duplicando páginas según sea necesario.
 
     Coordenadas de entrada: origen arriba-izquierda.
+
+    Con ``compact=True`` los content streams de cada página se comprimen tras el
+    merge y los objetos idénticos (fuentes, recursos y XObjects de la plantilla
+    repetidos en cada página) se comparten.
     """
 
     # Cargar la plantilla en memoria para poder clonar una página limpia N veces.
@@ -255,9 +281,7 @@ def generate_logbook_pdf_bytes(
         # Devuelve una copia de la plantilla
         writer = PdfWriter()
         writer.add_page(PdfReader(io.BytesIO(template_pdf_bytes)).pages[0])
-        out = io.BytesIO()
-        writer.write(out)
-        return out.getvalue()
+        return _write_pdf(writer, compact=compact)
 
     rows_per_page = int(layout.rows_per_page)
     num_pages = int(math.ceil(total_rows / rows_per_page))
@@ -389,8 +413,34 @@ def generate_logbook_pdf_bytes(
         if overlay_reader.pages:
             page.merge_page(overlay_reader.pages[0])
 
-        writer.add_page(page)
+        added_page = writer.add_page(page)
+        if compact:
+            # Solo se puede comprimir una vez la página pertenece al writer
+            added_page.compress_content_streams()
 
+    return _write_pdf(writer, compact=compact)
+
+
+def _write_pdf(writer: PdfWriter, *, compact: bool) -> bytes:
+    if compact:
+        # Cada página clona la plantilla y trae su propio diccionario de recursos
+        # (Helvetica, ExtGState, XObjects); aquí se deduplican entre páginas.
+        writer.compress_identical_objects()
     out = io.BytesIO()
     writer.write(out)
     return out.getvalue()
+
+
+def pdf_size_report(standard_pdf: bytes, compact_pdf: bytes) -> PdfSizeReport:
+    """Compara el tamaño (bytes totales y por página) de la salida estándar y la compacta."""
+    pages = len(PdfReader(io.BytesIO(compact_pdf)).pages)
+    return PdfSizeReport(pages=pages, standard_bytes=len(standard_pdf), compact_bytes=len(compact_pdf))
+
+
+def extract_pdf_pages(pdf_bytes: bytes, pages) -> bytes:
+    """PDF con solo las páginas indicadas (numeradas desde 1, en el orden dado)."""
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    writer = PdfWriter()
+    for page_number in pages:
+        writer.add_page(reader.pages[int(page_number) - 1])
+    return _write_pdf(writer, compact=True)
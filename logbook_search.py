@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Mapping
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+
+SEARCH_FIELDS: tuple[str, ...] = (
+    "Nombre del PIC",
+    "Matrícula",
+    "Fabricante",
+    "Origen",
+    "Destino",
+    "Tipo",
+    "Observaciones",
+)
+
+
+def _normalize_text(series: pd.Series) -> pd.Series:
+    """Minúsculas y sin acentos, para que "galan" encuentre "GALÁN"."""
+    return (
+        series.astype("string")
+        .fillna("")
+        .str.strip()
+        .str.casefold()
+        .str.normalize("NFKD")
+        .str.encode("ascii", errors="ignore")
+        .str.decode("ascii")
+    )
+
+
+def _normalize_term(term: str) -> str:
+    txt = unicodedata.normalize("NFKD", str(term).strip().casefold())
+    return txt.encode("ascii", errors="ignore").decode("ascii")
+
+
+@dataclass(frozen=True)
+class _FieldIndex:
+    # Índice invertido en formato CSR: terms ordenados, postings[offsets[i]:offsets[i+1]]
+    terms: np.ndarray
+    offsets: np.ndarray
+    postings: np.ndarray
+
+    def prefix_positions(self, prefix: str) -> np.ndarray:
+        lo = int(np.searchsorted(self.terms, prefix, side="left"))
+        hi = int(np.searchsorted(self.terms, prefix + "\uffff", side="left"))
+        # Puede contener repetidos si varias palabras de una fila comparten prefijo
+        return self.postings[self.offsets[lo]:self.offsets[hi]]
+
+
+def _build_field_index(values: pd.Series) -> _FieldIndex:
+    norm = _normalize_text(values).reset_index(drop=True)
+    # Tokens: el valor completo ("ec-abc") y cada palabra ("ec", "abc")
+    words = norm.str.split(r"[^0-9a-z]+", regex=True).explode()
+    tokens = pd.concat([norm, words])
+    tokens = tokens[tokens.notna() & (tokens != "")]
+
+    positions = tokens.index.to_numpy(dtype=np.int64)
+    codes, uniques = pd.factorize(tokens.to_numpy(dtype=object), sort=True)
+    order = np.lexsort((positions, codes))
+    codes = codes[order]
+    positions = positions[order]
+
+    # Quitar duplicados (mismo token dos veces en la misma fila)
+    keep = np.ones(len(codes), dtype=bool)
+    keep[1:] = (codes[1:] != codes[:-1]) | (positions[1:] != positions[:-1])
+    codes = codes[keep]
+    positions = positions[keep]
+
+    offsets = np.zeros(len(uniques) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes, minlength=len(uniques)), out=offsets[1:])
+    return _FieldIndex(terms=np.asarray(uniques, dtype=str), offsets=offsets, postings=positions)
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    positions: np.ndarray
+    rows_per_page: int
+
+    @property
+    def count(self) -> int:
+        return int(len(self.positions))
+
+    @property
+    def row_ranges(self) -> list[tuple[int, int]]:
+        """Tramos contiguos de filas (posición inicial y final, ambas incluidas)."""
+        if not len(self.positions):
+            return []
+        breaks = np.flatnonzero(np.diff(self.positions) != 1)
+        starts = np.concatenate(([self.positions[0]], self.positions[breaks + 1]))
+        ends = np.concatenate((self.positions[breaks], [self.positions[-1]]))
+        return [(int(s), int(e)) for s, e in zip(starts, ends)]
+
+    @property
+    def pages(self) -> list[int]:
+        """Páginas (1..N) del PDF exportado donde aparecen los resultados."""
+        return (np.unique(self.positions // self.rows_per_page) + 1).tolist()
+
+
+class LogbookSearchIndex:
+    """Índice invertido sobre las filas del logbook, en el mismo orden que el PDF.
+
+    Las posiciones devueltas son posiciones de fila (0..n-1) del DataFrame indexado.
+    """
+
+    def __init__(self, df: pd.DataFrame, *, fields: tuple[str, ...] = SEARCH_FIELDS, rows_per_page: int = 14):
+        self.num_rows = int(len(df))
+        self.rows_per_page = int(rows_per_page)
+        self.fields = tuple(f for f in fields if f in df.columns)
+        self._indexes = {f: _build_field_index(df[f]) for f in self.fields}
+
+    def _term_mask(self, field: str | None, term: str) -> np.ndarray:
+        mask = np.zeros(self.num_rows, dtype=bool)
+        indexes = self._indexes.values() if field is None else [self._indexes.get(field)]
+        for index in indexes:
+            if index is not None:
+                mask[index.prefix_positions(term)] = True
+        return mask
+
+    def search(self, filters: Mapping[str, str] | None = None, text: str | None = None) -> SearchResult:
+        """Busca filas que cumplan TODOS los términos (por prefijo).
+
+        ``filters`` limita cada término a un campo ({"Matrícula": "ec-x", "Destino": "lemd"});
+        ``text`` busca cada palabra en cualquiera de los campos indexados.
+        """
+        queries: list[tuple[str | None, str]] = []
+        for field, value in (filters or {}).items():
+            for term in _normalize_term(value or "").split():
+                queries.append((field, term))
+        for term in _normalize_term(text or "").split():
+            queries.append((None, term))
+
+        if not queries:
+            return SearchResult(positions=np.empty(0, dtype=np.int64), rows_per_page=self.rows_per_page)
+
+        # Intersección con máscaras booleanas: O(filas / 8) por término
+        result = self._term_mask(*queries[0])
+        for field, term in queries[1:]:
+            if not result.any():
+                break
+            result &= self._term_mask(field, term)
+        return SearchResult(positions=np.flatnonzero(result).astype(np.int64), rows_per_page=self.rows_per_page)